@@ -4,19 +4,51 @@ Solution to https://adventofcode.com/2023/day/1
 
 Usage: solution.py input_file
 """
+
+# pylint: disable=too-few-public-methods
+
+from collections import deque
+from multiprocessing import Pool
 from pathlib import Path
-from typing import Optional
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import argparse
 import cProfile
+import mmap
 import re
+import time
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+DEFAULT_PROFILE = "solution.prof"
 
 
-def _parse_args() -> Optional[Path]:
+def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument("--file", "-f", type=str, required=True)
-    (args, _) = parser.parse_known_args()
+    parser.add_argument("--benchmark", action="store_true", help="Compare scanner against regex")
+    parser.add_argument(
+        "--workers", "-w", type=int, default=1, help="Worker processes for the mmap reader"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bytes per worker chunk"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE,
+        default=None,
+        help=f"Write pstats data of the parent process to PROFILE (default: {DEFAULT_PROFILE})",
+    )
+    parser.add_argument(
+        "--timings", action="store_true", help="Report throughput of the parse and sum phases"
+    )
+    args, _ = parser.parse_known_args()
 
-    file_path = Path(args.file)
+    args.file = _resolve_file(args.file)
+    return args
+
+
+def _resolve_file(file_name: str) -> Optional[Path]:
+    file_path = Path(file_name)
     if not file_path:
         return None
 
@@ -76,7 +108,71 @@ REGEX_FIRST = f"({REGEX_GROUP}).*"
 REGEX_LAST = f"({REGEX_GROUP[::-1]}).*"
 
 
+class DigitScanner:
+    """\
+    Aho-Corasick automaton over a digit vocabulary.
+
+    The goto/failure construction is flattened into a complete transition table, so scanning a
+    line is a single forward pass with one table lookup per character. Overlapping tokens such as
+    "twone" are reported at every end position. No word in ``value_map`` contains another one,
+    so the first (last) token to end is also the first (last) token to start.
+    """
+
+    def __init__(self, vocabulary: Dict[str, str]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        self._output: List[int] = [0]
+        for word, digit in vocabulary.items():
+            state = 0
+            for char in word:
+                if char not in goto[state]:
+                    goto[state][char] = len(goto)
+                    goto.append({})
+                    self._output.append(0)
+                state = goto[state][char]
+            self._output[state] = int(digit)
+
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue: Deque[int] = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            self._output[state] = self._output[state] or self._output[fail[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0)
+                queue.append(next_state)
+
+        # Column-major table: one dict lookup per character, then index by current state.
+        alphabet = {char for table in delta for char in table}
+        self._root_column: List[int] = [0] * len(delta)
+        self._columns: Dict[str, List[int]] = {
+            char: [table.get(char, 0) for table in delta] for char in alphabet
+        }
+
+    def get_elf_number(self, line: str) -> int:
+        """Returns the two digit number formed by the first and last token in the line."""
+        columns = self._columns
+        root_column = self._root_column
+        output = self._output
+        state = first = last = 0
+        for char in line:
+            state = columns.get(char, root_column)[state]
+            if output[state]:
+                last = output[state]
+                if not first:
+                    first = last
+
+        return first * 10 + last
+
+
+SCANNER = DigitScanner(value_map)
+
+
 def _get_elf_number(line: str) -> int:
+    return SCANNER.get_elf_number(line)
+
+
+def _get_elf_number_regex(line: str) -> int:
     """To deal with overlaps, parse from the front and the back."""
     match_first = re.search(REGEX_FIRST, line)
 
@@ -90,18 +186,155 @@ def _get_elf_number(line: str) -> int:
     return int(value_map[first_digit] + value_map[last_digit])
 
 
-def main():
-    input_file_path = _parse_args()
-    if not input_file_path:
-        print("File does not exist")
+def _benchmark(input_file_path: Path, repeat: int = 5) -> None:
+    lines = input_file_path.read_text("utf-8").splitlines()
+    n_bytes = sum(len(line) for line in lines)
+
+    for name, parser in (("regex", _get_elf_number_regex), ("scanner", _get_elf_number)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            elf_sum = sum(parser(line) for line in lines)
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"{name:>8}: sum={elf_sum} best={best * 1e3:.2f}ms "
+            f"{len(lines) / best:,.0f} lines/s {n_bytes / best / 1e6:.2f} MB/s"
+        )
 
+
+def _sum_lines(input_file_path: Path) -> int:
     elf_sum = 0
     with open(input_file_path, encoding="utf-8") as file:
         for line in file:
             elf_sum += _get_elf_number(line)
+    return elf_sum
+
+
+class PhaseTimings(NamedTuple):
+    lines: int
+    read_seconds: float
+    scan_seconds: float
+    sum_seconds: float
+
+
+def _sum_lines_timed(
+    input_file_path: Path, batch_size: int = 1024 * 1024
+) -> Tuple[int, PhaseTimings]:
+    """\
+    Same as _sum_lines, but reads in batches so reading, scanning the lines for digit tokens and
+    summing the numbers can be timed apart.
+    """
+    elf_sum = lines = 0
+    read_seconds = scan_seconds = sum_seconds = 0.0
+    with open(input_file_path, encoding="utf-8") as file:
+        while True:
+            start = time.perf_counter()
+            batch = file.readlines(batch_size)
+            read = time.perf_counter()
+            numbers = [_get_elf_number(line) for line in batch]
+            scanned = time.perf_counter()
+            elf_sum += sum(numbers)
+            summed = time.perf_counter()
+
+            read_seconds += read - start
+            scan_seconds += scanned - read
+            sum_seconds += summed - scanned
+            lines += len(batch)
+            if not batch:
+                break
+    return (elf_sum, PhaseTimings(lines, read_seconds, scan_seconds, sum_seconds))
+
+
+def _report_timing(phase: str, seconds: float, n_bytes: int, lines: Optional[int]) -> None:
+    rate = f"{n_bytes / seconds / 1e6:.2f} MB/s" if seconds else "n/a"
+    if lines is not None and seconds:
+        rate += f" {lines / seconds:,.0f} lines/s"
+    print(f"{phase:>6}: {seconds * 1e3:.2f}ms {rate}")
+
+
+def _chunk_offsets(mapped: mmap.mmap, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Yields [start, end) byte offsets of chunks that end just after a newline."""
+    size = len(mapped)
+    start = 0
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = mapped.find(b"\n", end - 1)
+            end = size if newline == -1 else newline + 1
+        yield (start, end)
+        start = end
+
+
+def _sum_chunk(task: Tuple[Path, int, int]) -> Tuple[int, int]:
+    """Returns the sum and the number of lines of one chunk."""
+    input_file_path, start, end = task
+    with open(input_file_path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        text = mapped[start:end].decode("utf-8")
+    lines = text.splitlines()
+    return (sum(_get_elf_number(line) for line in lines), len(lines))
+
+
+def _sum_chunks(input_file_path: Path, workers: int, chunk_size: int) -> Tuple[int, int]:
+    """Memory-maps the input and sums newline-aligned chunks in a process pool."""
+    if input_file_path.stat().st_size == 0:
+        return (0, 0)
+
+    with open(input_file_path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped, Pool(processes=workers) as pool:
+        tasks = (
+            (input_file_path, start, end) for (start, end) in _chunk_offsets(mapped, chunk_size)
+        )
+        elf_sum = lines = 0
+        for chunk_sum, chunk_lines in pool.imap_unordered(_sum_chunk, tasks):
+            elf_sum += chunk_sum
+            lines += chunk_lines
+        return (elf_sum, lines)
+
+
+def main():
+    args = _parse_args()
+    input_file_path = args.file
+    if not input_file_path:
+        print("File does not exist")
+        return
+
+    if args.benchmark:
+        _benchmark(input_file_path)
+        return
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    timings = None
+    lines = None
+    start = time.perf_counter()
+    if args.workers > 1:
+        elf_sum, lines = _sum_chunks(input_file_path, args.workers, max(args.chunk_size, 1))
+    elif args.timings:
+        elf_sum, timings = _sum_lines_timed(input_file_path)
+    else:
+        elf_sum = _sum_lines(input_file_path)
+    wall_seconds = time.perf_counter() - start
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
 
     print(elf_sum)
 
+    if args.timings:
+        n_bytes = input_file_path.stat().st_size
+        if timings:
+            lines = timings.lines
+            _report_timing("read", timings.read_seconds, n_bytes, lines)
+            _report_timing("scan", timings.scan_seconds, n_bytes, lines)
+            _report_timing("sum", timings.sum_seconds, n_bytes, lines)
+        _report_timing("wall", wall_seconds, n_bytes, lines)
+
 
 if __name__ == "__main__":
-    cProfile.run("main()")
+    main()
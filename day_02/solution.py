@@ -5,80 +5,103 @@ Solution to https://adventofcode.com/2023/day/2
 Usage: solution.py
 """
 
-import math
 from pathlib import Path
 import re
-from typing import Literal
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+GAME_ID_PATTERN = re.compile(r"Game (\d+):")
+CUBE_PATTERN = re.compile(r"(\d+) (red|green|blue)")
+COLOUR_COLUMN = {"red": 0, "green": 1, "blue": 2}
+# Above this many cells the dominance table is not built and batches are answered by scanning.
+MAX_DOMINANCE_CELLS = 1 << 24
 
 
 class Cubes:
     """Reads file containing game information and computes elf madness"""
 
     def __init__(self, filename) -> None:
-        self.lines = Path(filename).read_text("utf-8").strip().split("\n")
+        lines = Path(filename).read_text("utf-8").strip().split("\n")
+
+        game_ids: List[int] = []
+        rgb_max: List[List[int]] = []
+        for line in lines:
+            game_ids.append(self._get_game_id(line))
+            rgb_max.append(self._get_rgb_max(line))
+
+        # Columnar view of the file: one row per game, columns hold the red/green/blue maxima.
+        self.game_ids = np.array(game_ids, dtype=np.int64)
+        self.rgb_max = np.array(rgb_max, dtype=np.int64).reshape(-1, 3)
+        self._dominance: Optional[Tuple[List[np.ndarray], np.ndarray]] = None
 
     def get_possible_games_id_sum(self, red_cubes: int, green_cubes: int, blue_cubes: int) -> int:
         """Returns sum of possible game IDs"""
-        id_sum = 0
-        for line in self.lines:
-            if self._is_game_valid(line, red_cubes, green_cubes, blue_cubes):
-                id_sum += self._get_game_id(line)
-
-        return id_sum
-
-    def _is_game_valid(self, line: str, red: int, green: int, blue: int) -> bool:
-        for game_set in line.split(";"):
-            if (
-                self._get_red(game_set) > red
-                or self._get_green(game_set) > green
-                or self._get_blue(game_set) > blue
-            ):
-                return False
-        return True
+        possible = np.all(self.rgb_max <= (red_cubes, green_cubes, blue_cubes), axis=1)
+        return int(self.game_ids[possible].sum())
+
+    def get_possible_games_id_sums(self, budgets: np.ndarray) -> np.ndarray:
+        """Returns the possible game ID sum for every (red, green, blue) row of an N x 3 array"""
+        budgets = np.asarray(budgets, dtype=np.int64).reshape(-1, 3)
+        dominance = self._get_dominance_table()
+        if dominance is None:
+            return np.array([self.get_possible_games_id_sum(*budget) for budget in budgets])
+
+        axes, table = dominance
+        ranks = [np.searchsorted(axes[c], budgets[:, c], side="right") for c in range(3)]
+        return table[ranks[0], ranks[1], ranks[2]]
+
+    def _get_dominance_table(self) -> Optional[Tuple[List[np.ndarray], np.ndarray]]:
+        """\
+        Builds a 3-D prefix sum of game IDs over the distinct per-colour maxima, once.
+
+        table[i, j, k] holds the ID sum of games whose red, green and blue maxima are at most the
+        i-th, j-th and k-th smallest distinct value of that colour (index 0 meaning "none"), so a
+        query costs three binary searches.
+        """
+        if self._dominance is not None:
+            return self._dominance
+
+        axes = [np.unique(self.rgb_max[:, c]) for c in range(3)]
+        shape = tuple(len(axis) + 1 for axis in axes)
+        if np.prod(shape) > MAX_DOMINANCE_CELLS:
+            return None
+
+        ranks = [np.searchsorted(axes[c], self.rgb_max[:, c]) + 1 for c in range(3)]
+        table = np.zeros(shape, dtype=np.int64)
+        np.add.at(table, (ranks[0], ranks[1], ranks[2]), self.game_ids)
+        for axis in range(3):
+            np.cumsum(table, axis=axis, out=table)
+
+        self._dominance = (axes, table)
+        return self._dominance
 
     def get_power_cubes(self) -> int:
         """Returns power cubes"""
-        power_cubes = 0
-        for line in self.lines:
-            rgb_max = [0, 0, 0]
-            for game_set in line.split(";"):
-                rgb_set = [
-                    self._get_red(game_set),
-                    self._get_green(game_set),
-                    self._get_blue(game_set),
-                ]
-                rgb_max = [max(rgb_max[i], rgb_set[i]) for i in range(3)]
-            power_cubes += math.prod(rgb_max)
-        return power_cubes
+        return int(self.rgb_max.prod(axis=1).sum())
 
     def _get_game_id(self, raw: str) -> int:
-        match = re.search(r"Game (\d+):", raw)
+        match = GAME_ID_PATTERN.search(raw)
 
         if not match:
             raise RuntimeError(f"Cannot parse Game ID from {raw}")
 
         return int(match.group(1))
 
-    def _get_red(self, raw: str) -> int:
-        return self._get_colour(raw, "red")
-
-    def _get_green(self, raw: str) -> int:
-        return self._get_colour(raw, "green")
-
-    def _get_blue(self, raw: str) -> int:
-        return self._get_colour(raw, "blue")
-
-    def _get_colour(self, raw: str, colour: Literal["red", "green", "blue"]) -> int:
-        match = re.search(f"(\\d+) {colour}", raw)
-        if not match:
-            return 0
-
-        return int(match.group(1))
+    def _get_rgb_max(self, raw: str) -> List[int]:
+        """Single pass over all sets of a game; a colour missing from every set counts as 0."""
+        rgb_max = [0, 0, 0]
+        for count, colour in CUBE_PATTERN.findall(raw):
+            column = COLOUR_COLUMN[colour]
+            rgb_max[column] = max(rgb_max[column], int(count))
+        return rgb_max
 
 
 if __name__ == "__main__":
     assert Cubes("example_01.txt").get_possible_games_id_sum(12, 13, 14) == 8
     assert Cubes("example_02.txt").get_power_cubes() == 2286
+    budget_sums = Cubes("example_01.txt").get_possible_games_id_sums(np.array([[12, 13, 14]]))
+    assert list(budget_sums) == [8]
 
     puzzle_result = Cubes("puzzle_input.txt")
     print(f"ID sum for puzzle 01: {puzzle_result.get_possible_games_id_sum(12, 13, 14)}")
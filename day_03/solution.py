@@ -5,11 +5,13 @@ Solution to https://adventofcode.com/2023/day/3
 Usage: solution.py
 """
 
+import math
 from pathlib import Path
 import re
-from typing import List
+from typing import List, NamedTuple, Set
+
+import numpy as np
 
-# Must read from East to West
 DIRECTIONS = [
     [-1, 1],  # NE
     [-1, 0],  # N
@@ -21,6 +23,16 @@ DIRECTIONS = [
     [1, -1],  # SW
 ]
 
+NUMBER_PATTERN = re.compile(r"\d+")
+NO_NUMBER = -1
+MAX_VECTOR_DIGITS = 18
+
+
+class Symbol(NamedTuple):
+    x: int
+    y: int
+    char: str
+
 
 class Engine:
     """Reads file engine schematic and processes it."""
@@ -28,74 +40,126 @@ class Engine:
     def __init__(self, filename) -> None:
         self.lines: List[str] = Path(filename).read_text("utf-8").strip().split("\n")
 
+        # Tokenize once: number values by id, a cell -> number id grid and the symbol cells.
+        self.numbers: List[int] = []
+        self.number_grid: List[List[int]] = []
+        self.symbols: List[Symbol] = []
+        for y, line in enumerate(self.lines):
+            row = [NO_NUMBER] * len(line)
+            for match in NUMBER_PATTERN.finditer(line):
+                (start, end) = match.span()
+                row[start:end] = [len(self.numbers)] * (end - start)
+                self.numbers.append(int(match.group()))
+            self.number_grid.append(row)
+            self.symbols.extend(
+                Symbol(x, y, char)
+                for x, char in enumerate(line)
+                if not char.isalnum() and char != "."
+            )
+
     def get_part_number_sum(self) -> int:
         """Returns part number sum"""
-
-        ret_val = 0
-        for y, line in enumerate(self.lines):
-            for x, char in enumerate(line):
-                if not char.isalnum() and char != ".":
-                    ret_val += self._get_surrounding_sum(x, y)
-        return ret_val
+        part_ids: Set[int] = set()
+        for symbol in self.symbols:
+            part_ids |= self._get_surrounding_ids(symbol)
+        return sum(self.numbers[part_id] for part_id in part_ids)
 
     def get_gear_ratio(self) -> int:
-        """Returns the gear ratio. Bad solution - It will not work for overlapping gears."""
+        """Returns the sum of gear ratios of every '*' next to exactly two part numbers."""
         ret_val = 0
-        for y, line in enumerate(self.lines):
-            for x, char in enumerate(line):
-                if not char.isalnum() and char != ".":
-                    ret_val += self._get_surrounding_product(x, y)
+        for symbol in self.symbols:
+            if symbol.char != "*":
+                continue
+            part_ids = self._get_surrounding_ids(symbol)
+            if len(part_ids) == 2:
+                ret_val += math.prod(self.numbers[part_id] for part_id in part_ids)
         return ret_val
 
-    def _get_and_replace_number(self, x: int, y: int) -> int:
-        """Search East and grab from West."""
-        extend_search = 0
-        for character in self.lines[y][x + 1 :]:
-            if character.isdigit():
-                extend_search += 1
-            else:
-                break
+    def _get_surrounding_ids(self, symbol: Symbol) -> Set[int]:
+        part_ids = set()
+        for dy, dx in DIRECTIONS:
+            (ye, xe) = (symbol.y + dy, symbol.x + dx)
+            if 0 <= ye < len(self.number_grid) and 0 <= xe < len(self.number_grid[ye]):
+                part_ids.add(self.number_grid[ye][xe])
+        part_ids.discard(NO_NUMBER)
+        return part_ids
 
-        match = re.search(r"(\d+)$", self.lines[y][: x + extend_search + 1])
-        assert match
 
-        (start, end) = match.span()
-        self.lines[y] = self.lines[y][:start] + "." * (end - start) + self.lines[y][end:]
-        return int(match.group(1))
+class VectorEngine:
+    """\
+    NumPy backend of Engine for very large schematics; the results are identical.
 
-    def _get_surrounding_sum(self, x: int, y: int) -> int:
-        ret_val = 0
-        for dy, dx in DIRECTIONS:
-            ye = self._clamp(y + dy, len(self.lines))
-            xe = self._clamp(x + dx, len(self.lines[ye]))
-            if self.lines[ye][xe].isdigit():
-                ret_val += self._get_and_replace_number(xe, ye)
+    The schematic is held as a uint8 array. Symbol neighbourhoods are a dilation built from array
+    shifts and digit runs are labelled with a cumulative sum, so no Python loop runs per cell.
+    """
 
-        return ret_val
+    def __init__(self, filename) -> None:
+        lines = Path(filename).read_bytes().strip().split(b"\n")
+        width = max(len(line) for line in lines)
+        # One '.' border all round keeps shifts in bounds and stops runs from wrapping rows.
+        raw = b"".join(b"." + line.ljust(width, b".") + b"." for line in lines)
+        grid = np.frombuffer(raw, dtype=np.uint8).reshape(len(lines), width + 2)
+        self.grid = np.pad(grid, ((1, 1), (0, 0)), constant_values=ord("."))
+
+        is_digit = (self.grid >= ord("0")) & (self.grid <= ord("9"))
+        self.symbols = ~is_digit & (self.grid != ord("."))
+        # Like Engine, letters are neither numbers nor symbols; '| 0x20' folds them to lower case.
+        self.symbols &= ((self.grid | 0x20) < ord("a")) | ((self.grid | 0x20) > ord("z"))
+
+        flat_digit = is_digit.ravel()
+        starts = flat_digit & ~np.roll(flat_digit, 1)
+        ends = flat_digit & ~np.roll(flat_digit, -1)
+        # Label 0 means "no number"; labels 1..N index self.numbers. Numbers are separated by at
+        # least one cell, so N <= cells / 2 and int32 labels hold any grid numpy can index here.
+        self.labels = np.cumsum(starts, dtype=np.int32).reshape(self.grid.shape)
+        self.labels *= is_digit
+
+        flat_labels = self.labels.ravel()
+        digit_positions = np.flatnonzero(flat_digit)
+        end_positions = np.flatnonzero(ends)
+        if np.any(end_positions - np.flatnonzero(starts) >= MAX_VECTOR_DIGITS):
+            raise ValueError(f"Numbers longer than {MAX_VECTOR_DIGITS} digits overflow int64")
+        exponents = end_positions[flat_labels[digit_positions] - 1] - digit_positions
+        place_values = (self.grid.ravel()[digit_positions] - ord("0")).astype(np.int64)
+        place_values *= np.int64(10) ** exponents
+        self.numbers = np.zeros(len(end_positions) + 1, dtype=np.int64)
+        np.add.at(self.numbers, flat_labels[digit_positions], place_values)
 
-    def _get_surrounding_product(self, x: int, y: int) -> int:
-        counter = 0
-        ret_val = 1
+    def get_part_number_sum(self) -> int:
+        """Returns part number sum"""
+        near_symbol = np.zeros_like(self.symbols)
         for dy, dx in DIRECTIONS:
-            ye = self._clamp(y + dy, len(self.lines))
-            xe = self._clamp(x + dx, len(self.lines[ye]))
-            if self.lines[ye][xe].isdigit():
-                ret_val *= self._get_and_replace_number(xe, ye)
-                counter += 1
-        if counter != 2:
-            return 0
+            near_symbol |= np.roll(self.symbols, (dy, dx), axis=(0, 1))
+        part_ids = np.unique(self.labels[near_symbol])
+        return sum(self.numbers[part_ids].tolist())
 
-        return ret_val
-
-    def _clamp(self, value: int, upper_bound: int, lower_bound: int = 0) -> int:
-        return min(max(value, lower_bound), upper_bound)
+    def get_gear_ratio(self) -> int:
+        """Returns the sum of gear ratios of every '*' next to exactly two part numbers."""
+        (gear_y, gear_x) = np.nonzero(self.grid == ord("*"))
+        neighbours = np.sort(
+            np.stack([self.labels[gear_y + dy, gear_x + dx] for dy, dx in DIRECTIONS], axis=1),
+            axis=1,
+        )
+        distinct = neighbours != 0
+        distinct[:, 1:] &= neighbours[:, 1:] != neighbours[:, :-1]
+        is_gear = distinct.sum(axis=1) == 2
+        # Each gear row has exactly two distinct labels, so the selection reshapes into pairs.
+        pairs = self.numbers[neighbours[is_gear][distinct[is_gear]].reshape(-1, 2)].tolist()
+        # Python ints for the products: two 10+ digit numbers already overflow int64.
+        return sum(first * second for first, second in pairs)
 
 
 if __name__ == "__main__":
     assert Engine("example_01.txt").get_part_number_sum() == 4361
     assert Engine("example_02.txt").get_gear_ratio() == 467835
 
+    assert VectorEngine("example_01.txt").get_part_number_sum() == 4361
+    assert VectorEngine("example_02.txt").get_gear_ratio() == 467835
+
     puzzle_result = Engine("puzzle_input.txt")
     print(f"Part number sum for puzzle 01: {puzzle_result.get_part_number_sum()}")
-    puzzle_result = Engine("puzzle_input.txt")
     print(f"Gear ratio sum for puzzle 02: {puzzle_result.get_gear_ratio()}")
+
+    vector_result = VectorEngine("puzzle_input.txt")
+    assert vector_result.get_part_number_sum() == puzzle_result.get_part_number_sum()
+    assert vector_result.get_gear_ratio() == puzzle_result.get_gear_ratio()
@@ -6,9 +6,11 @@ Usage: solution.py
 """
 
 
+from array import array
+from collections import deque
 from enum import Enum
 from pathlib import Path
-from typing import List
+from typing import Deque, Iterable, Iterator
 
 
 class CardPart(Enum):
@@ -23,48 +25,59 @@ class ScratchCard:
     """Loads in a scratch card number with its solution"""
 
     def __init__(self, filename: str) -> None:
-        self.lines: List[str] = Path(filename).read_text("utf-8").strip().split("\n")
+        lines = Path(filename).read_text("utf-8").strip().split("\n")
+        self.match_counts = array("H", self.iter_match_counts(lines))
 
     def get_winning_pot(self) -> int:
         """Returns total winnings"""
-        winnings = 0
-        for line in self.lines:
-            dealt = set(self._get_dealt_hand(line))
-            solution = set(self._get_winning_numbers(line))
-            hits_n = len(dealt.intersection(solution))
-
-            if hits_n > 0:
-                winnings += 2 ** (hits_n - 1)
-
-        return winnings
+        return sum(1 << (hits_n - 1) for hits_n in self.match_counts if hits_n > 0)
 
     def count_total_cards(self) -> int:
         """Counts the number of scratch cards"""
-        cards = [1] * len(self.lines)
-
-        for card_n, line in enumerate(self.lines):
-            dealt = set(self._get_dealt_hand(line))
-            solution = set(self._get_winning_numbers(line))
-            hits_n = len(dealt.intersection(solution))
-
-            if hits_n == 0:
-                continue
-
-            for i in range(card_n + 1, card_n + hits_n + 1):
-                cards[i] += cards[card_n]
-
-        return sum(cards)
-
-    def _get_dealt_hand(self, line: str) -> List[int]:
-        return self._get_numbers(CardPart.DEALT, line)
-
-    def _get_winning_numbers(self, line: str) -> List[int]:
-        return self._get_numbers(CardPart.SOLUTION, line)
-
-    def _get_numbers(self, card_part: CardPart, line: str) -> List[int]:
-        ret_val = []
+        return self.count_cascade(self.match_counts)
+
+    @classmethod
+    def count_total_cards_streamed(cls, filename: str) -> int:
+        """Counts the number of scratch cards reading the file one line at a time"""
+        with open(filename, encoding="utf-8") as file:
+            return cls.count_cascade(cls.iter_match_counts(line for line in file if line.strip()))
+
+    @staticmethod
+    def count_cascade(match_counts: Iterable[int]) -> int:
+        """\
+        Counts cards won in cascade, keeping only the copies pending for the next cards.
+
+        The window never grows deeper than the largest match count, so memory is constant in the
+        number of cards.
+        """
+        total = 0
+        pending: Deque[int] = deque()
+        for hits_n in match_counts:
+            copies = 1 + (pending.popleft() if pending else 0)
+            total += copies
+
+            if len(pending) < hits_n:
+                pending.extend([0] * (hits_n - len(pending)))
+            for i in range(hits_n):
+                pending[i] += copies
+
+        return total
+
+    @classmethod
+    def iter_match_counts(cls, lines: Iterable[str]) -> Iterator[int]:
+        """Yields the number of winning numbers dealt on every card"""
+        for line in lines:
+            dealt = cls._get_mask(CardPart.DEALT, line)
+            solution = cls._get_mask(CardPart.SOLUTION, line)
+            yield (dealt & solution).bit_count()
+
+    @staticmethod
+    def _get_mask(card_part: CardPart, line: str) -> int:
+        """Encodes the numbers of a card part as a bitmask with bit n set for number n"""
+        ret_val = 0
         try:
-            ret_val = [int(num) for num in line.split(":")[1].split("|")[card_part.value].split()]
+            for num in line.split(":")[1].split("|")[card_part.value].split():
+                ret_val |= 1 << int(num)
         except IndexError:
             print(f"Cannot parse numbers from line: {line}")
         return ret_val
@@ -73,7 +86,12 @@ class ScratchCard:
 if __name__ == "__main__":
     assert ScratchCard("example_01.txt").get_winning_pot() == 13
     assert ScratchCard("example_02.txt").count_total_cards() == 30
+    assert ScratchCard.count_total_cards_streamed("example_02.txt") == 30
 
     puzzle_result = ScratchCard("puzzle_input.txt")
     print(f"Total winning pot for puzzle 01: {puzzle_result.get_winning_pot()}")
     print(f"Total winning pot for puzzle 01: {puzzle_result.count_total_cards()}")
+    assert (
+        ScratchCard.count_total_cards_streamed("puzzle_input.txt")
+        == puzzle_result.count_total_cards()
+    )
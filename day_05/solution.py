@@ -9,9 +9,13 @@ Usage: solution.py
 from enum import Enum
 from pathlib import Path
 import re
-from typing import Dict, List, Tuple
+from bisect import bisect_left, bisect_right
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
 
 class MapOption(Enum):
     """Map options"""
@@ -25,6 +29,10 @@ class MapOption(Enum):
     HUMIDITY_2_LOCATION = "humidity-to-location"
 
 
+# Half-open integer interval [start, end)
+Interval = Tuple[int, int]
+
+
 @dataclass
 class MapInformation:
     """Map information"""
@@ -41,49 +49,125 @@ class RangeMap:
     """Store map in memory for quicker access"""
 
     def __init__(self, lines: List[str]) -> None:
-        self._maps: List[MapInformation] = []
+        maps: List[MapInformation] = []
         for line in lines:
             (destination, source, value_range) = line.split()
-            self._maps.append(
+            maps.append(
                 MapInformation(
                     source_range_start=int(source),
                     desintation_range_start=int(destination),
                     range_length=int(value_range),
                 )
             )
-        self._maps.sort(key=lambda item: item.source_range_start)
-
-    def map_value(self, source_value: float) -> Tuple[float, float]:
+        self._set_maps(maps)
+
+    @classmethod
+    def from_maps(cls, maps: List[MapInformation]) -> "RangeMap":
+        """Creates a RangeMap from already parsed map information"""
+        range_map = cls([])
+        range_map._set_maps(maps)
+        return range_map
+
+    def _set_maps(self, maps: List[MapInformation]) -> None:
+        """\
+        Sorts the maps and indexes them as a piecewise translation of the whole number line.
+
+        _starts holds every breakpoint in order and _offsets[i] the offset that applies from
+        _starts[i - 1] up to _starts[i], with _offsets[0] = 0 for values below the first
+        breakpoint, so a lookup is a single bisect_right into _starts.
+        """
+        self._maps = sorted(maps, key=lambda item: item.source_range_start)
+        self._starts: List[int] = []
+        self._offsets: List[int] = [0]
+        for map_info in self._maps:
+            source_start = map_info.source_range_start
+            offset = map_info.desintation_range_start - source_start
+            if self._starts and self._starts[-1] == source_start:
+                self._offsets[-1] = offset
+            else:
+                self._starts.append(source_start)
+                self._offsets.append(offset)
+            self._starts.append(source_start + map_info.range_length)
+            self._offsets.append(0)
+
+    @property
+    def breakpoints(self) -> List[int]:
+        """Sorted values at which the mapping offset may change"""
+        return self._starts
+
+    def map_value(self, source_value: int) -> int:
         """Returns mapped value"""
-        destination_value = source_value
-        range_to_end = float(1)
-
-        for index, map_info in enumerate(self._maps):
-            if source_value < map_info.source_range_start:
-                range_to_end = self._maps[index].source_range_start - source_value
-                break
-
-            if (
-                map_info.source_range_start
-                <= source_value
-                < map_info.source_range_start + map_info.range_length
-            ):
-                destination_value = (
-                    map_info.desintation_range_start + source_value - map_info.source_range_start
+        return source_value + self._offsets[bisect_right(self._starts, source_value)]
+
+    def map_values(self, source_values: np.ndarray) -> np.ndarray:
+        """Returns mapped values for an array of source values"""
+        source_values = np.asarray(source_values, dtype=np.int64)
+        indices = np.searchsorted(np.array(self._starts, dtype=np.int64), source_values, "right")
+        return source_values + np.array(self._offsets, dtype=np.int64)[indices]
+
+    def compose(self, other: "RangeMap") -> "RangeMap":
+        """Returns a single RangeMap equivalent to mapping through self and then other"""
+        maps: List[MapInformation] = []
+        ordered = self._composed_breakpoints(other)
+        for source_start, source_end in zip(ordered, ordered[1:]):
+            destination_start = other.map_value(self.map_value(source_start))
+            if destination_start != source_start:
+                maps.append(
+                    MapInformation(
+                        source_range_start=source_start,
+                        desintation_range_start=destination_start,
+                        range_length=source_end - source_start,
+                    )
                 )
-                range_to_end = map_info.range_length - (map_info.source_range_start - source_value)
-                range_to_end /= 2
-                break
-
-            if (
-                index + 1 < len(self._maps)
-                and source_value < self._maps[index + 1].source_range_start
-            ):
-                destination_value = source_value
-                range_to_end = self._maps[index + 1].source_range_start - source_value
-                break
-
-        return (destination_value, range_to_end)
+        return RangeMap.from_maps(maps)
+
+    def _composed_breakpoints(self, other: "RangeMap") -> List[int]:
+        """\
+        The composition can only change offset at own breakpoints or where the image of one of
+        own segments crosses a breakpoint of other.
+        """
+        other_starts = other.breakpoints
+        breakpoints = set(self._starts)
+        bounds: List[Optional[int]] = [None, *self._starts, None]
+        for index, offset in enumerate(self._offsets):
+            (lower, upper) = (bounds[index], bounds[index + 1])
+            first = 0 if lower is None else bisect_left(other_starts, lower + offset)
+            last = len(other_starts)
+            if upper is not None:
+                last = bisect_left(other_starts, upper + offset)
+            breakpoints.update(start - offset for start in other_starts[first:last])
+        return sorted(breakpoints)
+
+    def map_interval(self, start: int, end: int) -> List[Interval]:
+        """\
+        Splits [start, end) at the breakpoints and returns the mapped intervals.
+
+        The walk starts at the segment holding start, found by bisect, and only visits the
+        segments the interval overlaps.
+        """
+        mapped: List[Interval] = []
+        cursor = start
+        index = bisect_right(self._starts, start)
+        while cursor < end:
+            segment_end = min(end, self._starts[index]) if index < len(self._starts) else end
+            offset = self._offsets[index]
+            mapped.append((cursor + offset, segment_end + offset))
+            cursor = segment_end
+            index += 1
+        return mapped
+
+    def map_intervals(self, intervals: Iterable[Interval]) -> List[Interval]:
+        """Maps a set of intervals and coalesces the overlapping or touching results"""
+        mapped = sorted(
+            interval for start, end in intervals for interval in self.map_interval(start, end)
+        )
+        merged: List[Interval] = []
+        for start, end in mapped:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
 
     def __repr__(self) -> str:
         ret_val = ""
@@ -109,48 +193,31 @@ class Almanac:
             key = match.group(1)
             self._range_maps[key] = RangeMap(data)
 
+        self._seed_to_location = reduce(
+            RangeMap.compose, (self._range_maps[stage.value] for stage in MapOption)
+        )
+
     def lowest_location_number(self) -> int:
         """Returns the lowest location number"""
-        min_location = float("inf")
-        for seed in self.seeds:
-            test_value, _ = self._calculate_location_and_range(seed)
-            min_location = min(min_location, test_value)
-        return int(min_location)
+        return min(self._seed_to_location.map_value(seed) for seed in self.seeds)
+
+    def locations(self, seeds: np.ndarray) -> np.ndarray:
+        """Returns the location of every seed in an array"""
+        return self._seed_to_location.map_values(seeds)
 
     def lowest_location_number_in_range(self) -> int:
         """Returns the lowest location number in seed range"""
-        min_location = float("inf")
-        seed_ranges = list(zip(self.seeds[::2], self.seeds[1::2]))
-        seed_ranges.sort(key=lambda value: value[0])
-        for seed_start, seed_range in seed_ranges:
-            seed = float(seed_start)
-            while seed < seed_start + seed_range:
-                print(seed)
-                (test_location, test_range) = self._calculate_location_and_range(seed)
-                min_location = min(min_location, test_location)
-                seed += test_range
-        return int(min_location)
-
-    def _calculate_location_and_range(self, seed: float) -> Tuple[float, float]:
-        stages = [
-            "seed-to-soil",
-            "soil-to-fertilizer",
-            "fertilizer-to-water",
-            "water-to-light",
-            "light-to-temperature",
-            "temperature-to-humidity",
-            "humidity-to-location",
+        intervals = [
+            (seed_start, seed_start + seed_range)
+            for seed_start, seed_range in zip(self.seeds[::2], self.seeds[1::2])
         ]
-        min_range = float("inf")
-        for stage in stages:
-            (seed, map_range) = self._range_maps[stage].map_value(seed)
-            min_range = min(min_range, map_range)
-        return (seed, min_range)
+        return min(start for start, _ in self._seed_to_location.map_intervals(intervals))
 
 
 if __name__ == "__main__":
     assert Almanac("example.txt").lowest_location_number() == 35
     assert Almanac("example.txt").lowest_location_number_in_range() == 46
+    assert list(Almanac("example.txt").locations(np.array([79, 14, 55, 13]))) == [82, 43, 86, 35]
 
     puzzle_result = Almanac("puzzle_input.txt")
     print(f"Lowest location value for puzzle 01: {puzzle_result.lowest_location_number()}")
@@ -6,9 +6,17 @@ Usage: solution.py
 """
 
 
+from itertools import islice
 import math
 from pathlib import Path
+import tempfile
 from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+# Charge times below this keep t * t inside int64 for the vectorized solver.
+MAX_VECTOR_TIME = 1 << 31
 
 
 @dataclass
@@ -45,7 +53,8 @@ class Speedboat:
         """Returns the winning possibility sum for massive race."""
         return self._get_winning_num(self.race)
 
-    def _get_winning_num(self, race: Race) -> int:
+    @staticmethod
+    def _get_winning_num(race: Race) -> int:
         """
         d = distance, t = time, c = charge time, v = velocity
         v = c .......... (1)
@@ -55,18 +64,74 @@ class Speedboat:
         c = (t +- (t^2 - 4.d)^0.5) / 2
         Where c will result in the two values that will result in a draw. Natural numbers between
         c1 and c2 will win the race.
+
+        The root is only estimated, with math.isqrt; the bound is settled with exact integer
+        comparisons, so the count stays correct far beyond 2^53.
         """
         t = race.time
         d = race.distance
-        lower_bound = max((t - (t**2 - 4 * d) ** 0.5) / 2, 0)
-        lower_bound = lower_bound + 1 if lower_bound.is_integer() else math.ceil(lower_bound)
-        upper_bound = min((t + (t**2 - 4 * d) ** 0.5) / 2, t)
-        upper_bound = upper_bound - 1 if upper_bound.is_integer() else math.floor(upper_bound)
-        return upper_bound - lower_bound + 1
+        if d < 0:
+            return t + 1
+        if (t // 2) * (t - t // 2) <= d:
+            return 0
+        discriminant = t * t - 4 * d
+
+        # Smallest charge time that beats the distance, using isqrt as the starting estimate.
+        lower_bound = max((t - math.isqrt(discriminant)) // 2, 0)
+        while lower_bound * (t - lower_bound) <= d:
+            lower_bound += 1
+        while lower_bound > 0 and (lower_bound - 1) * (t - lower_bound + 1) > d:
+            lower_bound -= 1
+        # The winning charge times are symmetric around t / 2.
+        return max(t - 2 * lower_bound + 1, 0)
+
+    @classmethod
+    def get_winning_nums(cls, times: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """Returns the winning possibility count of every (time, distance) pair"""
+        times = np.asarray(times, dtype=np.int64)
+        distances = np.asarray(distances, dtype=np.int64)
+        if times.size and times.max() >= MAX_VECTOR_TIME:
+            return np.array(
+                [
+                    cls._get_winning_num(Race(time=int(t), distance=int(d)))
+                    for (t, d) in zip(times, distances)
+                ],
+                dtype=object,
+            )
+
+        discriminant = times * times - 4 * distances
+        lower = np.maximum((times - np.sqrt(np.maximum(discriminant, 0))).astype(np.int64) // 2, 0)
+        # Float sqrt is off by at most one step each way here; settle it with exact products.
+        for _ in range(2):
+            lower += lower * (times - lower) <= distances
+        for _ in range(2):
+            lower -= (lower > 0) & ((lower - 1) * (times - lower + 1) > distances)
+
+        counts = np.maximum(times - 2 * lower + 1, 0)
+        counts[(times // 2) * (times - times // 2) <= distances] = 0
+        counts[distances < 0] = times[distances < 0] + 1
+        return counts
+
+    @classmethod
+    def score_race_table(cls, filename: str, chunk_size: int = 1 << 20) -> Iterator[np.ndarray]:
+        """Streams a file of "time distance" lines and yields winning counts per chunk"""
+        with open(filename, encoding="utf-8") as file:
+            while lines := list(islice(file, chunk_size)):
+                # Blank lines would leave np.loadtxt an empty chunk without columns.
+                if rows := [line for line in lines if line.strip()]:
+                    chunk = np.loadtxt(rows, dtype=np.int64, ndmin=2)
+                    yield cls.get_winning_nums(chunk[:, 0], chunk[:, 1])
 
 
 if __name__ == "__main__":
     assert Speedboat("example.txt").get_winning_product() == 288
+    example_counts = Speedboat.get_winning_nums(np.array([7, 15, 30]), np.array([9, 40, 200]))
+    assert list(example_counts) == [4, 8, 9]
+    with tempfile.TemporaryDirectory() as table_dir:
+        race_table = Path(table_dir) / "races.txt"
+        race_table.write_text("7 9\n\n15 40\n\n", encoding="utf-8")
+        race_chunks = Speedboat.score_race_table(str(race_table), chunk_size=1)
+        assert [list(counts) for counts in race_chunks] == [[4], [8]]
 
     puzzle_result = Speedboat("puzzle_input.txt")
     print(f"The product of the winning sums for puzzle 01: {puzzle_result.get_winning_product()}")
@@ -4,42 +4,242 @@ Solution to https://adventofcode.com/2023/day/8
 
 Usage: solution.py
 """
+# pylint: disable=too-many-instance-attributes
 
+import math
 from pathlib import Path
 import re
-from typing import Dict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
 
+import numpy as np
 
-def get_number_lookups(input_path: Path) -> int:
-    directions, _, *node_maps = input_path.read_text(encoding="utf-8").split("\n")
+NODE_PATTERN = re.compile(r"(\w+) = \((\w+), (\w+)\)")
+
+
+class Arrivals(NamedTuple):
+    """\
+    Every step count at which a walk from one start stands on a goal node.
+
+    Steps in `transient` happen once; after `cycle_start` the walk repeats every `period` steps
+    and arrives at `cycle_start + offset + k * period` for every offset in `offsets` and k >= 0,
+    except at step 0. Offsets are sorted and reduced modulo `period`.
+    """
+
+    transient: List[int]
+    cycle_start: int
+    period: int
+    offsets: List[int]
+
+    def contains(self, steps: int) -> bool:
+        if steps < self.cycle_start:
+            return steps in self.transient
+        return (steps - self.cycle_start) % self.period in self.offsets
+
+
+class Network:
+    """Network compiled into integer-indexed successor arrays."""
+
+    def __init__(self, text: str) -> None:
+        directions, _, *node_maps = text.strip().split("\n")
+
+        mappings: List[Tuple[str, str, str]] = []
+        for node_map in node_maps:
+            matches = NODE_PATTERN.match(node_map)
+            assert matches
+
+            key, left, right = matches.groups()
+            mappings.append((key, left, right))
+
+        self.names: List[str] = [key for key, _, _ in mappings]
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        # Successor lists indexed by instruction: 0 for left and 1 for right.
+        self.successors: Tuple[List[int], List[int]] = (
+            [self.index[left] for _, left, _ in mappings],
+            [self.index[right] for _, _, right in mappings],
+        )
+        self.instructions: List[int] = [0 if direction == "L" else 1 for direction in directions]
+
+        successors = np.array(self.successors, dtype=np.int32)
+        position = np.arange(len(self.names), dtype=np.int32)
+        for instruction in self.instructions:
+            position = successors[instruction, position]
+        self.pass_jump: List[int] = position.tolist()
+
+        # _lifting[level] holds the node reached after 2^level full passes.
+        self._lifting: List[np.ndarray] = [position]
+        # Built on the first positions_after query; see _get_prefix.
+        self._prefix: Optional[np.ndarray] = None
+
+        self._pass_hits: Dict[Tuple[FrozenSet[int], int], List[int]] = {}
+
+    @classmethod
+    def from_file(cls, input_path: Path) -> "Network":
+        return cls(input_path.read_text(encoding="utf-8"))
+
+    def arrivals(self, start: str, goals: Iterable[str]) -> Arrivals:
+        """Walks pass by pass until the pass-start node repeats and collects goal arrivals."""
+        goal_ids = frozenset(self.index[goal] for goal in goals)
+        pass_length = len(self.instructions)
+
+        seen: Dict[int, int] = {}
+        hits: List[int] = []
+        node = self.index[start]
+        while node not in seen:
+            seen[node] = len(seen)
+            pass_start = seen[node] * pass_length
+            hits.extend(pass_start + step for step in self._get_pass_hits(node, goal_ids))
+            node = self.pass_jump[node]
 
-    pattern = r"(\w+) = \((\w+), (\w+)\)"
-    mappings: Dict[str, Dict[str, str]] = {}
-    for node_map in node_maps:
-        matches = re.match(pattern, node_map)
-        assert matches
+        cycle_start = seen[node] * pass_length
+        period = (len(seen) - seen[node]) * pass_length
+        return Arrivals(
+            transient=[steps for steps in hits if steps < cycle_start],
+            cycle_start=cycle_start,
+            period=period,
+            offsets=sorted(
+                {(steps - cycle_start) % period for steps in hits if steps >= cycle_start}
+            ),
+        )
 
-        key, left, right = matches.groups()
-        mappings[key] = {
-            "L": left,
-            "R": right,
-        }
+    def first_arrival(self, start: str, goals: Iterable[str]) -> Optional[int]:
+        """Returns the steps needed to reach any goal from start, None if it is unreachable."""
+        arrivals = self.arrivals(start, goals)
+        if arrivals.transient:
+            return arrivals.transient[0]
+        if not arrivals.offsets:
+            return None
+        # A start on its own cycle arrives after a full period, not at step 0.
+        return min(arrivals.cycle_start + offset or arrivals.period for offset in arrivals.offsets)
+
+    def simultaneous_arrival(self, starts: Iterable[str], goals: Iterable[str]) -> Optional[int]:
+        """Returns the first step at which walks from all starts stand on goals at once."""
+        goals = list(goals)
+        all_arrivals = [self.arrivals(start, goals) for start in starts]
+        if not all_arrivals:
+            raise ValueError("At least one start node is required")
+
+        # Before every walk has entered its cycle, a common arrival is a transient one of the
+        # walk with the longest lead-in.
+        lead_in = max(all_arrivals, key=lambda arrivals: arrivals.cycle_start)
+        for steps in lead_in.transient:
+            if all(arrivals.contains(steps) for arrivals in all_arrivals):
+                return steps
+
+        # Afterwards each walk is periodic, so combine the residues with the CRT.
+        residues: Set[Tuple[int, int]] = {(0, 1)}
+        for arrivals in all_arrivals:
+            cyclic = [
+                ((arrivals.cycle_start + offset) % arrivals.period, arrivals.period)
+                for offset in arrivals.offsets
+            ]
+            combined = (_combine_residues(first, second) for first in residues for second in cyclic)
+            residues = {residue for residue in combined if residue is not None}
+        if not residues:
+            return None
+
+        # Step 0 is not a move, so the first candidate is step 1 even if every walk starts cyclic.
+        earliest = max(lead_in.cycle_start, 1)
+        return min(
+            remainder + max(0, -(-(earliest - remainder) // modulus)) * modulus
+            for remainder, modulus in residues
+        )
+
+    def position_after(self, start: str, steps: int) -> str:
+        """Returns the node reached from start after the given number of steps."""
+        (node,) = self.positions_after(np.array([self.index[start]]), np.array([steps]))
+        return self.names[node]
+
+    def positions_after(self, nodes: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        """\
+        Returns the node index reached from each node index after the matching step count.
+
+        Full instruction passes are taken with binary lifting over the pass jump table and the
+        remaining steps with one lookup into the prefix table, so a query is O(log steps).
+        """
+        nodes = np.array(nodes, dtype=np.int32)
+        steps = np.asarray(steps, dtype=np.int64)
+        (passes, remainder) = np.divmod(steps, len(self.instructions))
+
+        self._extend_lifting(int(passes.max(initial=0)).bit_length())
+        for level, table in enumerate(self._lifting):
+            take = (passes >> level) & 1 == 1
+            nodes[take] = table[nodes[take]]
+        return self._get_prefix()[remainder, nodes]
+
+    def _get_prefix(self) -> np.ndarray:
+        """\
+        _prefix[r] holds the node reached from every node after the first r instructions.
+
+        The table takes (instructions + 1) * nodes int32 entries, so it is only built once a
+        position query needs it.
+        """
+        if self._prefix is None:
+            successors = np.array(self.successors, dtype=np.int32)
+            self._prefix = np.empty((len(self.instructions) + 1, len(self.names)), dtype=np.int32)
+            self._prefix[0] = np.arange(len(self.names), dtype=np.int32)
+            for step, instruction in enumerate(self.instructions):
+                self._prefix[step + 1] = successors[instruction, self._prefix[step]]
+        return self._prefix
+
+    def _extend_lifting(self, levels: int) -> None:
+        while len(self._lifting) < levels:
+            self._lifting.append(self._lifting[-1][self._lifting[-1]])
+
+    def _get_pass_hits(self, node: int, goal_ids: FrozenSet[int]) -> List[int]:
+        """Steps within one instruction pass from node, 1-based, that land on a goal."""
+        key = (goal_ids, node)
+        if key not in self._pass_hits:
+            successors = self.successors
+            hits = []
+            for step, instruction in enumerate(self.instructions, start=1):
+                node = successors[instruction][node]
+                if node in goal_ids:
+                    hits.append(step)
+            self._pass_hits[key] = hits
+        return self._pass_hits[key]
+
+
+def _combine_residues(first: Tuple[int, int], second: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+    """Generalised CRT: merges x = a (mod m) and x = b (mod n), None if they contradict."""
+    (a, m), (b, n) = first, second
+    gcd = math.gcd(m, n)
+    if (b - a) % gcd:
+        return None
+    lcm = m // gcd * n
+    step = (b - a) // gcd * pow(m // gcd, -1, n // gcd) % (n // gcd)
+    return ((a + m * step) % lcm, lcm)
+
+
+def get_number_lookups(input_path: Path) -> int:
+    steps = Network.from_file(input_path).first_arrival("AAA", ["ZZZ"])
+    if steps is None:
+        raise ValueError("ZZZ cannot be reached from AAA")
+    return steps
 
-    current_position = "AAA"
-    destination = "ZZZ"
 
-    lookups = 0
-    while True:
-        for direction in directions:
-            current_position = mappings[current_position][direction]
-            lookups += 1
-            if current_position == destination:
-                return lookups
+def get_ghost_lookups(input_path: Path) -> int:
+    network = Network.from_file(input_path)
+    starts = [name for name in network.names if name.endswith("A")]
+    goals = [name for name in network.names if name.endswith("Z")]
+    steps = network.simultaneous_arrival(starts, goals)
+    if steps is None:
+        raise ValueError("The **A nodes never stand on **Z nodes at the same time")
+    return steps
 
 
 if __name__ == "__main__":
     assert get_number_lookups(Path("example.txt")) == 6
+    assert get_ghost_lookups(Path("example.txt")) == 6
+    assert Network.from_file(Path("example.txt")).position_after("AAA", 10**15) == "ZZZ"
+    # Goal starts on their own cycle arrive after a full period, stored as offset 0.
+    looped = Network("L\n\nAAA = (BBB, BBB)\nBBB = (AAA, AAA)")
+    assert looped.first_arrival("AAA", ["AAA"]) == 2
+    assert looped.simultaneous_arrival(["AAA"], ["AAA"]) == 2
+    transient = Network(
+        "L\n\nAAA = (ZZZ, ZZZ)\nZZZ = (CCC, CCC)\nCCC = (CCC, CCC)\nBBB = (BBB, BBB)"
+    )
+    assert transient.simultaneous_arrival(["AAA", "BBB"], ["ZZZ", "BBB"]) == 1
 
     puzzle_input = Path("puzzle_input.txt")
     print(f"Steps required for puzzle 01: {get_number_lookups(puzzle_input)}")
-    print(f"The winning sums for puzzle 02: {puzzle_result.get_winning_num()}")
+    print(f"Steps required for puzzle 02: {get_ghost_lookups(puzzle_input)}")
@@ -6,8 +6,24 @@ Usage: solution.py
 """
 
 
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+import os
 from pathlib import Path
-from typing import List
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+
+class WorkerStats(NamedTuple):
+    lines: int
+    seconds: float
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds else 0.0
+
+    def add(self, other: "WorkerStats") -> "WorkerStats":
+        return WorkerStats(self.lines + other.lines, self.seconds + other.seconds)
 
 
 class SpringMap:
@@ -16,15 +32,110 @@ class SpringMap:
     def __init__(self, filename: str) -> None:
         self.lines: List[str] = Path(filename).read_text("utf-8").strip().split("\n")
 
-    def get_sum_of_broken_spring_variance(self) -> int:
-        # for line in self.lines:
-        #     (record, contiguous_groups) = line.split()
-        #     groups = [int(group) for group in contiguous_groups]
-        return 0
+    def get_sum_of_broken_spring_variance(self, unfold: int = 1) -> int:
+        """Returns the sum of possible arrangements over all records, unfolded `unfold` times."""
+        return sum(self.count_arrangements(*self.parse_line(line, unfold)) for line in self.lines)
+
+    @staticmethod
+    def parse_line(line: str, unfold: int = 1) -> Tuple[str, List[int]]:
+        (record, contiguous_groups) = line.split()
+        groups = [int(group) for group in contiguous_groups.split(",")]
+        return ("?".join([record] * unfold), groups * unfold)
+
+    @staticmethod
+    def count_arrangements(record: str, groups: Sequence[int]) -> int:
+        """\
+        Counts the ways to place the damaged groups in the record.
+
+        ways[i] is the number of arrangements of groups[j:] in record[i:]; the table is built for
+        j from the last group to the first, keeping only the row of group j + 1. This is
+        O(len(record) * len(groups)) time and O(len(record)) memory per record.
+        """
+        length = len(record)
+
+        # Length of the run of possibly damaged springs ('#' or '?') starting at every position.
+        run = [0] * (length + 1)
+        for i in range(length - 1, -1, -1):
+            run[i] = run[i + 1] + 1 if record[i] != "." else 0
+
+        # With no groups left, the rest of the record must be free of damaged springs.
+        ways = [0] * (length + 1)
+        ways[length] = 1
+        for i in range(length - 1, -1, -1):
+            ways[i] = ways[i + 1] if record[i] != "#" else 0
+
+        for group in reversed(groups):
+            next_ways = ways
+            ways = [0] * (length + 1)
+            for i in range(length - 1, -1, -1):
+                if record[i] != "#":
+                    ways[i] = ways[i + 1]
+                end = i + group
+                if run[i] >= group and (end == length or record[end] != "#"):
+                    ways[i] += next_ways[min(end + 1, length)]
+
+        return ways[0]
 
-    def todo(self) -> None: ...
+    @classmethod
+    def get_sum_streamed(
+        cls, filename: str, unfold: int = 1, workers: Optional[int] = None, chunk_size: int = 10000
+    ) -> Tuple[int, Dict[int, WorkerStats]]:
+        """\
+        Streams records from disk in chunks of `chunk_size` lines to a process pool.
+
+        At most two chunks per worker are in flight, so memory does not grow with the file.
+        Returns the arrangement sum and the lines handled and busy time of every worker PID.
+        """
+        workers = workers or os.cpu_count() or 1
+        total = 0
+        stats: Dict[int, WorkerStats] = {}
+        with open(filename, encoding="utf-8") as file, ProcessPoolExecutor(workers) as pool:
+            for pid, chunk_total, chunk_stats in _map_bounded(
+                pool, _iter_chunks(file, chunk_size), unfold, in_flight=2 * workers
+            ):
+                total += chunk_total
+                stats[pid] = stats.get(pid, WorkerStats(0, 0.0)).add(chunk_stats)
+        return (total, stats)
+
+
+def _map_bounded(
+    pool: ProcessPoolExecutor, chunks: Iterator[List[str]], unfold: int, in_flight: int
+) -> Iterator[Tuple[int, int, WorkerStats]]:
+    """Like pool.map over the chunks, but only reads ahead `in_flight` chunks."""
+    pending: Set[Future] = set()
+    while True:
+        for chunk in islice(chunks, in_flight - len(pending)):
+            pending.add(pool.submit(_count_chunk, chunk, unfold))
+        if not pending:
+            return
+
+        (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def _iter_chunks(lines: Iterator[str], chunk_size: int) -> Iterator[List[str]]:
+    while chunk := list(islice(lines, chunk_size)):
+        yield [line for line in chunk if line.strip()]
+
+
+def _count_chunk(lines: List[str], unfold: int) -> Tuple[int, int, WorkerStats]:
+    start = time.perf_counter()
+    total = sum(SpringMap.count_arrangements(*SpringMap.parse_line(line, unfold)) for line in lines)
+    return (os.getpid(), total, WorkerStats(len(lines), time.perf_counter() - start))
 
 
 if __name__ == "__main__":
-    # assert SpringMap("example.txt").get_winning_pot() == 21
-    pass
+    assert SpringMap("example.txt").get_sum_of_broken_spring_variance() == 21
+    assert SpringMap("example.txt").get_sum_of_broken_spring_variance(unfold=5) == 525152
+
+    puzzle_result = SpringMap("puzzle_input.txt")
+    print(f"Solution 01: {puzzle_result.get_sum_of_broken_spring_variance()}")
+    print(f"Solution 02: {puzzle_result.get_sum_of_broken_spring_variance(unfold=5)}")
+
+    (streamed_sum, all_stats) = SpringMap.get_sum_streamed(
+        "puzzle_input.txt", unfold=5, chunk_size=100
+    )
+    assert streamed_sum == puzzle_result.get_sum_of_broken_spring_variance(unfold=5)
+    for worker_pid, worker in sorted(all_stats.items()):
+        print(f"Worker {worker_pid}: {worker.lines} lines, {worker.lines_per_second:,.0f} lines/s")
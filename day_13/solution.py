@@ -6,10 +6,25 @@ Usage: solution.py
 """
 # pylint: disable=too-few-public-methods
 
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from enum import Enum, auto
-from pathlib import Path
-from typing import List, NamedTuple
-import numpy as np
+from itertools import islice
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+BIT_TABLE = str.maketrans("#.", "10")
+
+T = TypeVar("T")
 
 
 class Direction(Enum):
@@ -28,48 +43,133 @@ class MirrorMaze:
         if not raw_maze:
             raise ValueError("raw_maze cannot be empty")
 
-        self.maze = np.array([[1 if char == "#" else 0 for char in line] for line in raw_maze])
+        self.raw_maze = raw_maze
+        # Every row and column encoded once as a bitmask with '#' as set bits.
+        self.rows = [self._to_bitmask(line) for line in raw_maze]
+        self.columns = [self._to_bitmask("".join(column)) for column in zip(*raw_maze)]
+
+    @staticmethod
+    def _to_bitmask(line: str) -> int:
+        return int(line.translate(BIT_TABLE), 2)
 
     def get_reflection_checksum(self, tolerance: int) -> int:
-        vert_sig = self._get_submatrix_signature(self.maze, tolerance)
-        hor_sig = self._get_submatrix_signature(np.rot90(self.maze), tolerance)
+        vert_sig = self._get_signature(self.columns, tolerance)
+        hor_sig = self._get_signature(self.rows, tolerance)
 
         if vert_sig.reflection_line == hor_sig.reflection_line == -1:
-            raise RuntimeError(f"No reflection found for matrix:\n{self.maze}")
+            maze = "\n".join(self.raw_maze)
+            raise RuntimeError(f"No reflection found for matrix:\n{maze}")
 
         return max(vert_sig.reflection_line, hor_sig.reflection_line * 100)
 
-    def _get_submatrix_signature(self, matrix: np.ndarray, tolerance) -> MatrixSignature:
-        columns = matrix.shape[1]
-        max_window_size = columns - (columns % 2)
+    def _get_signature(self, lines: List[int], tolerance: int) -> MatrixSignature:
+        """Finds the mirror between lines, trying the widest reflections first."""
+        count = len(lines)
+        max_window_size = count - (count % 2)
 
         for window_size in range(max_window_size, 1, -2):
-            if self._is_matrix_symmetric(matrix[:, :window_size], tolerance):
-                return MatrixSignature(window_size // 2, window_size)
-            if self._is_matrix_symmetric(matrix[:, -window_size:], tolerance):
-                return MatrixSignature(columns - window_size // 2, window_size)
+            for reflection_line in (window_size // 2, count - window_size // 2):
+                if self._count_smudges(lines, reflection_line, tolerance) == tolerance:
+                    return MatrixSignature(reflection_line, window_size)
         return MatrixSignature(-1, -1)
 
-    def _is_matrix_symmetric(self, matrix: np.ndarray, tolerance) -> bool:
-        # Splitting the matrix in twine results in a balanced tuple unpacking.
-        # pylint: disable-next=unbalanced-tuple-unpacking
-        left, right = np.split(matrix, 2, axis=1)
-        return np.count_nonzero(left != np.fliplr(right)) == tolerance
+    def _count_smudges(self, lines: List[int], reflection_line: int, tolerance: int) -> int:
+        """Counts differing cells of mirrored line pairs, stopping once past tolerance."""
+        smudges = 0
+        for offset in range(min(reflection_line, len(lines) - reflection_line)):
+            mirrored = lines[reflection_line - 1 - offset] ^ lines[reflection_line + offset]
+            smudges += mirrored.bit_count()
+            if smudges > tolerance:
+                break
+        return smudges
+
+
+def iter_raw_mazes(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Yields the lines of one maze at a time; mazes are separated by blank lines."""
+    raw_maze: List[str] = []
+    for line in lines:
+        if line := line.strip():
+            raw_maze.append(line)
+        elif raw_maze:
+            yield raw_maze
+            raw_maze = []
+    if raw_maze:
+        yield raw_maze
+
+
+def _get_reflection_checksums(raw_maze: List[str], tolerances: Tuple[int, ...]) -> List[int]:
+    maze = MirrorMaze(raw_maze)
+    return [maze.get_reflection_checksum(tolerance) for tolerance in tolerances]
+
+
+def _get_batch_checksums(raw_mazes: Iterable[List[str]], tolerances: Tuple[int, ...]) -> List[int]:
+    totals = [0] * len(tolerances)
+    for raw_maze in raw_mazes:
+        checksums = _get_reflection_checksums(raw_maze, tolerances)
+        totals = [total + checksum for total, checksum in zip(totals, checksums)]
+    return totals
+
+
+def _iter_batches(raw_mazes: Iterator[List[str]], batch_size: int) -> Iterator[List[List[str]]]:
+    while batch := list(islice(raw_mazes, batch_size)):
+        yield batch
+
+
+def _submit_in_order(
+    pool: ProcessPoolExecutor, function: Callable[..., T], calls: Iterable[Tuple], in_flight: int
+) -> Iterator[T]:
+    """Yields function(*args) for every args in calls, in order, with `in_flight` calls queued."""
+    queued: Deque["Future[T]"] = deque()
+    for args in calls:
+        if len(queued) == in_flight:
+            yield queued.popleft().result()
+        queued.append(pool.submit(function, *args))
+    while queued:
+        yield queued.popleft().result()
 
 
 class Solution:
     def __init__(self, filename: str) -> None:
-        file_contents = Path(filename).read_text("utf-8").strip().split("\n\n")
-        self.mazes = [MirrorMaze(content.split("\n")) for content in file_contents]
+        self.filename = filename
 
     def get_maze_checksum(self, tolerance: int = 0) -> int:
-        return sum(maze.get_reflection_checksum(tolerance) for maze in self.mazes)
+        (checksum,) = self.get_maze_checksums((tolerance,))
+        return checksum
+
+    def get_maze_checksums(
+        self,
+        tolerances: Tuple[int, ...] = (0, 1),
+        workers: Optional[int] = None,
+        batch_size: int = 64,
+    ) -> List[int]:
+        """\
+        Streams the mazes from file once and sums the checksum of every tolerance.
+
+        Without workers only one maze is held in memory at a time. With workers, batches of
+        `batch_size` mazes go to a process pool and only 2 * workers batches are read ahead.
+        """
+        with open(self.filename, encoding="utf-8") as file:
+            if not workers:
+                return _get_batch_checksums(iter_raw_mazes(file), tolerances)
+
+            totals = [0] * len(tolerances)
+            with ProcessPoolExecutor(workers) as pool:
+                calls = (
+                    (batch, tolerances) for batch in _iter_batches(iter_raw_mazes(file), batch_size)
+                )
+                for checksums in _submit_in_order(
+                    pool, _get_batch_checksums, calls, in_flight=2 * workers
+                ):
+                    totals = [total + checksum for total, checksum in zip(totals, checksums)]
+            return totals
 
 
 if __name__ == "__main__":
     assert Solution("example.txt").get_maze_checksum() == 405
     assert Solution("example.txt").get_maze_checksum(tolerance=1) == 400
 
-    puzzle_result = Solution("puzzle_input.txt")
-    print(f"Solution 01: {puzzle_result.get_maze_checksum()}")
-    print(f"Solution 02: {puzzle_result.get_maze_checksum(tolerance=1)}")
+    assert Solution("example.txt").get_maze_checksums(workers=2) == [405, 400]
+
+    (solution_01, solution_02) = Solution("puzzle_input.txt").get_maze_checksums()
+    print(f"Solution 01: {solution_01}")
+    print(f"Solution 02: {solution_02}")
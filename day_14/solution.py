@@ -5,137 +5,130 @@ Solution to https://adventofcode.com/2023/day/14
 Usage: solution.py
 """
 
-from contextlib import contextmanager
-from enum import Enum, auto
+from enum import IntEnum
 from pathlib import Path
-from typing import Iterator, List, Optional, Tuple
+from typing import Dict, List, NamedTuple
 
 import numpy as np
 
 
-class Element(Enum):
-    SPACE = auto()
-    CUBE = auto()
-    BOULDER = auto()
+class Element(IntEnum):
+    SPACE = 0
+    CUBE = 1
+    BOULDER = 2
+
+
+CHARACTERS = {".": Element.SPACE, "#": Element.CUBE, "O": Element.BOULDER}
+
+
+class SegmentTable(NamedTuple):
+    """\
+    Cube-delimited segments of one tilt direction, precomputed because cubes never move.
+
+    fill_order lists the free cells of every segment, segment after segment, starting at the
+    cube or wall the boulders roll towards; fill_start is where each segment begins in it and
+    segment_of maps every free cell to its segment.
+    """
+
+    segment_of: np.ndarray
+    fill_start: np.ndarray
+    fill_order: np.ndarray
 
 
 class Board:
+    """Board kept as fixed cube cells plus the flat indices of the boulders."""
+
     def __init__(self, board_data: List[str]) -> None:
-        self.content = np.array(
-            [[self._map_to_element(character) for character in line] for line in board_data]
+        content = np.array(
+            [[self._map_to_element(character) for character in line] for line in board_data],
+            dtype=np.uint8,
         )
+        self.shape = content.shape
+        self._cubes = content.ravel() == Element.CUBE
+        self._boulders = np.flatnonzero(content == Element.BOULDER)
+
+        cells = np.arange(content.size).reshape(self.shape)
+        # Each row of these arrays is one line of cells, ordered from the side tilted towards.
+        self._north = self._get_segment_table(cells.T)
+        self._west = self._get_segment_table(cells)
+        self._south = self._get_segment_table(cells.T[:, ::-1])
+        self._east = self._get_segment_table(cells[:, ::-1])
 
     def _map_to_element(self, character: str) -> Element:
-        if character == ".":
-            return Element.SPACE
-        if character == "O":
-            return Element.BOULDER
-        if character == "#":
-            return Element.CUBE
-
-        raise RuntimeError(f"Unkown character: {character}")
-
-    def _map_from_element(self, element: Element) -> str:
-        if element == Element.BOULDER:
-            return "O"
-        if element == Element.CUBE:
-            return "#"
-        if element == Element.SPACE:
-            return "."
-
-        raise RuntimeError(f"Unkown element: {element}")
-
-    @contextmanager
-    def boulder_positions(self) -> Iterator[List[Tuple[int, int]]]:
-        try:
-            positions = []
-            row_n, col_n = self.content.shape
-            for c_i in range(col_n):
-                for r_i in range(1, row_n):
-                    if self.content[r_i][c_i] == Element.BOULDER:
-                        positions.append((r_i, c_i))
-            yield positions
-        finally:
-            pass
+        if character not in CHARACTERS:
+            raise RuntimeError(f"Unkown character: {character}")
+        return CHARACTERS[character]
+
+    def _get_segment_table(self, lines: np.ndarray) -> SegmentTable:
+        cube = self._cubes[lines]
+        segment_starts = np.zeros_like(cube)
+        segment_starts[:, 0] = True
+        segment_starts[:, 1:] = cube[:, :-1]
+        segments = np.cumsum(segment_starts.ravel()) - 1
+
+        free = ~cube.ravel()
+        fill_order = lines.ravel()[free]
+        segment_of = np.full(self._cubes.size, -1)
+        segment_of[fill_order] = segments[free]
+        segment_sizes = np.bincount(segments[free], minlength=segments[-1] + 1)
+        fill_start = np.cumsum(segment_sizes) - segment_sizes
+        return SegmentTable(segment_of, fill_start, fill_order)
+
+    @property
+    def content(self) -> np.ndarray:
+        content = np.full(self._cubes.size, Element.SPACE, dtype=np.uint8)
+        content[self._cubes] = Element.CUBE
+        content[self._boulders] = Element.BOULDER
+        return content.reshape(self.shape)
 
     def __str__(self) -> str:
-        return "\n".join(
-            "".join(self._map_from_element(element) for element in line) for line in self.content
-        )
+        characters = np.array(list(CHARACTERS))[np.argsort(list(CHARACTERS.values()))]
+        return "\n".join("".join(line) for line in characters[self.content])
 
     def get_load(self) -> int:
-        load = 0
-        rows, cols = self.content.shape
-        for r_i in range(rows):
-            for c_i in range(cols):
-                if self.content[r_i][c_i] == Element.BOULDER:
-                    load += rows - r_i
-        return load
+        (rows, cols) = self.shape
+        return int((rows - self._boulders // cols).sum())
 
     def spin_cycle(self) -> None:
-        for _ in range(4):
-            self.tilt_north()
-            self.content = np.rot90(self.content, 3)  # 3 for counter-clockwise
+        for table in (self._north, self._west, self._south, self._east):
+            self._tilt(table)
 
     def load_after_n_cycles(self, n_cycles: float) -> int:
-        if not isinstance(n_cycles, int):
-            n_cycles = int(n_cycles)
-
-        load_values = np.array([self.get_load()])
-        for _ in range(n_cycles):
+        """\
+        Spins until a board state repeats, then reads the load off the detected cycle.
+
+        States are keyed on the sorted boulder positions, since cubes never move, and mapped to
+        the cycle at which they were first seen.
+        """
+        n_cycles = int(n_cycles)
+
+        first_seen: Dict[bytes, int] = {}
+        loads: List[int] = []
+        for cycle in range(n_cycles):
+            state = np.sort(self._boulders).tobytes()
+            if state in first_seen:
+                cycle_start = first_seen[state]
+                cycle_length = cycle - cycle_start
+                return loads[cycle_start + (n_cycles - cycle_start) % cycle_length]
+
+            first_seen[state] = cycle
+            loads.append(self.get_load())
             self.spin_cycle()
-            load_values = np.append(load_values, self.get_load())
-            pattern_length = self._get_pattern_length(load_values)
-            oscillation_period = self._oscillation_period(load_values)
-            match_length = pattern_length if pattern_length is not None else oscillation_period
-            if match_length is not None:
-                pattern = load_values[-match_length:]
-                pattern_idx = (n_cycles - len(load_values)) % len(pattern)
-                return pattern[pattern_idx]
         return self.get_load()
 
-    def _get_pattern_length(self, data: np.ndarray) -> Optional[int]:
-        data_length = len(data)
-        if data_length < 6:
-            return None
-        for pattern_length in range(3, data_length // 2):
-            test_pattern = data[-pattern_length:]
-            search_pattern = data[-2 * pattern_length : -pattern_length]
-            if np.array_equal(test_pattern, search_pattern):
-                return pattern_length
-        return None
-
-    def _oscillation_period(self, data: np.ndarray, threshold: float = 0.01) -> Optional[int]:
-        if len(data) < 500:
-            return None
-        data_without_dc = data - np.mean(data)
-        windowed_data = data_without_dc * np.hanning(len(data_without_dc))
-        fft_result = np.fft.fft(windowed_data)
-        frequencies = np.fft.fftfreq(len(data), d=1.0)  # Unit time interval
-        magnitude = np.abs(fft_result)
-
-        ignore_freq_below = threshold
-        magnitude[frequencies < ignore_freq_below] = 0
-        dominant_freq_idx = np.argmax(magnitude)
-        dominant_frequency = frequencies[dominant_freq_idx]
-        if dominant_frequency == 0:
-            return None
-        period = round(1 / dominant_frequency)
-
-        if period < len(data) // 10:  # Ensure you get all frequencies
-            return period
-        return None
-
     def tilt_north(self) -> None:
-        with self.boulder_positions() as positions:
-            for r_i, c_i in positions:
-                self._move_boulder_north(r_i, c_i)
-
-    def _move_boulder_north(self, row: int, column: int) -> None:
-        while row > 0 and self.content[row - 1][column] == Element.SPACE:
-            self.content[row][column] = Element.SPACE
-            row -= 1
-            self.content[row][column] = Element.BOULDER
+        self._tilt(self._north)
+
+    def _tilt(self, table: SegmentTable) -> None:
+        """\
+        Boulders are counted per segment and refill the first cells of their segment.
+
+        Only arrays the size of the boulders and of the segment table are touched.
+        """
+        counts = np.bincount(table.segment_of[self._boulders], minlength=len(table.fill_start))
+        first_boulder = np.cumsum(counts) - counts
+        rank = np.arange(len(self._boulders)) + np.repeat(table.fill_start - first_boulder, counts)
+        self._boulders = table.fill_order[rank]
 
 
 class Solution:
@@ -6,41 +6,222 @@ Usage: solution.py
 """
 
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, TextIO, Tuple
 from functools import reduce
 from dataclasses import dataclass
+import argparse
+import time
 
+import numpy as np
 
-@dataclass
+# HASH_TABLE[value, byte] is the HASH state after feeding byte to state value.
+HASH_TABLE = (((np.arange(256)[:, None] + np.arange(256)) * 17) % 256).astype(np.uint8)
+COMMA = ord(",")
+NEWLINE = ord("\n")
+
+
+def hash_tokens(buffer: np.ndarray) -> np.ndarray:
+    """\
+    Returns the HASH of every comma-separated token in a uint8 buffer.
+
+    Tokens are hashed side by side: step k feeds the k-th byte of every token still long
+    enough through HASH_TABLE, so the Python loop runs once per byte of the longest token.
+    Tokens are sorted by descending length first, so the tokens still active at step k are a
+    prefix and the total work stays proportional to the buffer, even with one very long token.
+    """
+    buffer = buffer[buffer != NEWLINE]
+    commas = np.flatnonzero(buffer == COMMA)
+    starts = np.concatenate(([0], commas + 1))
+    lengths = np.concatenate((commas, [len(buffer)])) - starts
+
+    order = np.argsort(-lengths, kind="stable")
+    sorted_starts = starts[order]
+    # active[k] is the number of tokens longer than k.
+    active = np.searchsorted(-lengths[order], -np.arange(lengths.max()), side="left")
+
+    sorted_values = np.zeros(len(starts), dtype=np.uint8)
+    for step, count in enumerate(active.tolist()):
+        head = sorted_values[:count]
+        head[:] = HASH_TABLE[head, buffer[sorted_starts[:count] + step]]
+
+    values = np.empty_like(sorted_values)
+    values[order] = sorted_values
+    return values
+
+
+def iter_token_hashes(file: BinaryIO, chunk_size: int = 1 << 24) -> Iterator[np.ndarray]:
+    """Streams a comma-separated sequence from file and yields token hashes chunk by chunk."""
+    carry = b""
+    while chunk := file.read(chunk_size):
+        data = carry + chunk
+        last_comma = data.rfind(b",")
+        if last_comma == -1:
+            carry = data
+            continue
+        carry = data[last_comma + 1 :]
+        yield hash_tokens(np.frombuffer(memoryview(data)[:last_comma], dtype=np.uint8))
+    if carry.strip():
+        yield hash_tokens(np.frombuffer(carry.strip(), dtype=np.uint8))
+
+
+@dataclass(slots=True)
 class Lens:
     label: str
     focal_length: int
 
 
+def _fenwick_add(tree: List[int], index: int, delta: int) -> None:
+    while index < len(tree):
+        tree[index] += delta
+        index += index & -index
+
+
+def _fenwick_prefix(tree: List[int], index: int) -> int:
+    total = 0
+    while index > 0:
+        total += tree[index]
+        index -= index & -index
+    return total
+
+
+def _fenwick_append(tree: List[int], value: int) -> int:
+    """Appends value at the next position and returns that position."""
+    index = len(tree)
+    # The new node covers (index - lowbit, index], whose earlier entries are already in the tree.
+    covered = _fenwick_prefix(tree, index - 1) - _fenwick_prefix(tree, index & (index - 1))
+    tree.append(value + covered)
+    return index
+
+
+def _fenwick_build(values: List[int]) -> List[int]:
+    tree = [0, *values]
+    for index in range(1, len(tree)):
+        parent = index + (index & -index)
+        if parent < len(tree):
+            tree[parent] += tree[index]
+    return tree
+
+
 class Box:
+    """\
+    Lenses keyed by label; dicts keep insertion order, so updates keep a lens in its slot.
+
+    `power` is the box's sum of slot * focal length, kept up to date on every change. Each lens
+    is given the next position on insertion, and Fenwick trees over those positions count the
+    lenses and sum their focal lengths, which gives the slot of a lens and the focal length
+    behind it in O(log n). Positions are compacted once removed lenses outnumber live ones.
+    """
+
     def __init__(self) -> None:
-        self.lenses: List[Lens] = []
+        self.lenses_: Dict[str, Lens] = {}
+        self.power = 0
+        self._focal_sum = 0
+        self._positions: Dict[str, int] = {}
+        self._counts: List[int] = [0]
+        self._focals: List[int] = [0]
+
+    @property
+    def lenses(self) -> List[Lens]:
+        return list(self.lenses_.values())
 
     def add_lens(self, lens: Lens) -> None:
-        if (lens_index := self.contains_lens_(lens.label)) is not None:
-            self.lenses[lens_index].focal_length = lens.focal_length
-        else:
-            self.lenses.append(lens)
+        if (existing := self.lenses_.get(lens.label)) is not None:
+            position = self._positions[lens.label]
+            delta = lens.focal_length - existing.focal_length
+            self.power += _fenwick_prefix(self._counts, position) * delta
+            self._focal_sum += delta
+            _fenwick_add(self._focals, position, delta)
+            existing.focal_length = lens.focal_length
+            return
+
+        self.lenses_[lens.label] = lens
+        self.power += len(self.lenses_) * lens.focal_length
+        self._focal_sum += lens.focal_length
+        self._positions[lens.label] = _fenwick_append(self._counts, 1)
+        _fenwick_append(self._focals, lens.focal_length)
 
     def remove_lens(self, label: str) -> None:
-        self.lenses = [lens for lens in self.lenses if lens.label != label]
+        if (lens := self.lenses_.pop(label, None)) is None:
+            return
+
+        position = self._positions.pop(label)
+        slot = _fenwick_prefix(self._counts, position)
+        behind = self._focal_sum - _fenwick_prefix(self._focals, position)
+        # The lens leaves and every lens behind it moves up one slot.
+        self.power -= slot * lens.focal_length + behind
+        self._focal_sum -= lens.focal_length
+        _fenwick_add(self._counts, position, -1)
+        _fenwick_add(self._focals, position, -lens.focal_length)
 
-    def contains_lens_(self, label: str) -> Optional[int]:
-        for index, lens in enumerate(self.lenses):
-            if lens.label == label:
-                return index
-        return None
+        if len(self._counts) > 2 * len(self.lenses_) + 64:
+            self._compact()
+
+    def contains_lens_(self, label: str) -> bool:
+        return label in self.lenses_
+
+    def _compact(self) -> None:
+        self._positions = {label: slot for slot, label in enumerate(self.lenses_, start=1)}
+        self._counts = _fenwick_build([1] * len(self.lenses_))
+        self._focals = _fenwick_build([lens.focal_length for lens in self.lenses_.values()])
+
+
+def hash_label(label: str) -> int:
+    value = 0
+    for char in label:
+        value = (value + ord(char)) * 17 & 255
+    return value
+
+
+class FocusingPowerTracker:
+    """Applies HASHMAP steps one by one and keeps the total focusing power current."""
+
+    def __init__(self) -> None:
+        self.boxes = [Box() for _ in range(256)]
+        self.power = 0
+        self.operations = 0
+
+    def apply(self, step: str) -> None:
+        if "=" in step:
+            label, focal_length = step.split("=")
+            box_num = hash_label(label)
+            box = self.boxes[box_num]
+            before = box.power
+            box.add_lens(Lens(label, int(focal_length)))
+        elif "-" in step:
+            label, _ = step.split("-")
+            box_num = hash_label(label)
+            box = self.boxes[box_num]
+            before = box.power
+            box.remove_lens(label)
+        else:
+            raise ValueError(f"Unexpected value: {step}")
+
+        self.power += (box_num + 1) * (box.power - before)
+        self.operations += 1
+
+    def checkpoints(self, steps: Iterable[str], every: int) -> Iterator[Tuple[int, int]]:
+        """Applies the steps and yields (operations, power) every `every` steps and at the end."""
+        for step in steps:
+            self.apply(step)
+            if self.operations % every == 0:
+                yield (self.operations, self.power)
+        if self.operations % every:
+            yield (self.operations, self.power)
+
+
+def iter_steps(file: TextIO, chunk_size: int = 1 << 20) -> Iterator[str]:
+    """Streams the comma-separated steps of a file without reading it whole."""
+    carry = ""
+    while chunk := file.read(chunk_size):
+        *steps, carry = (carry + chunk.replace("\n", "")).split(",")
+        yield from steps
+    if carry:
+        yield carry
 
 
 class AsciiParser:
     def __init__(self, ascii_string: str) -> None:
         self.ascii_string_ = ascii_string
-        self.boxes_: List[Box] = [Box() for _ in range(256)]
 
     def _get_value(self, tmp_ascii: str) -> int:
         def calculate_ascii_value(first_char: int, second_char: int) -> int:
@@ -49,24 +230,59 @@ class AsciiParser:
         return reduce(calculate_ascii_value, [ord(char) for char in tmp_ascii], 0)
 
     def get_total_value(self) -> int:
+        buffer = np.frombuffer(self.ascii_string_.encode("ascii"), dtype=np.uint8)
+        return int(hash_tokens(buffer).sum(dtype=np.int64))
+
+    def get_total_value_reduce(self) -> int:
         return sum(self._get_value(ascii) for ascii in self.ascii_string_.split(","))
 
     def get_focussing_power(self) -> int:
-        for ascii_string in self.ascii_string_.split(","):
-            if "=" in ascii_string:
-                label, focal_length = ascii_string.split("=")
-                self.boxes_[self._get_value(label)].add_lens(Lens(label, int(focal_length)))
-            elif "-" in ascii_string:
-                label, _ = ascii_string.split("-")
-                self.boxes_[self._get_value(label)].remove_lens(label)
-            else:
-                raise ValueError(f"Unexpected value: {ascii_string}")
-
-        return sum(
-            (box_num + 1) * (lens_num + 1) * lens.focal_length
-            for box_num, box in enumerate(self.boxes_)
-            for lens_num, lens in enumerate(box.lenses)
-        )
+        tracker = FocusingPowerTracker()
+        for step in self.ascii_string_.split(","):
+            tracker.apply(step)
+        return tracker.power
+
+
+def get_total_value_streamed(filename: str) -> int:
+    with open(filename, "rb") as file:
+        return sum(int(hashes.sum(dtype=np.int64)) for hashes in iter_token_hashes(file))
+
+
+def _benchmark(filename: str, copies: int = 500) -> None:
+    sequence = ",".join([Path(filename).read_text("utf-8").strip()] * copies)
+    parser = AsciiParser(ascii_string=sequence)
+    for name, method in (
+        ("reduce", parser.get_total_value_reduce),
+        ("table", parser.get_total_value),
+    ):
+        start = time.perf_counter()
+        total = method()
+        seconds = time.perf_counter() - start
+        throughput = len(sequence) / seconds / 1e6
+        print(f"{name:>8}: total={total} {seconds * 1e3:.1f}ms {throughput:.2f} MB/s")
+
+
+def _benchmark_focussing_power(labels: int = 2000, seed: int = 15) -> None:
+    """Operation logs of growing length whose labels all collide in one box."""
+    rng = np.random.default_rng(seed)
+    candidates = ["".join(chars) for chars in rng.choice(list("abcdefghij"), size=(10**6, 6))]
+    hashes = hash_tokens(np.frombuffer(",".join(candidates).encode("ascii"), dtype=np.uint8))
+    colliding = [label for label, value in zip(candidates, hashes) if value == 0][:labels]
+
+    for operations in (10**4, 10**5, 10**6):
+        steps = [
+            f"{label}-" if remove else f"{label}={focal_length}"
+            for label, remove, focal_length in zip(
+                rng.choice(colliding, operations),
+                rng.random(operations) < 0.3,
+                rng.integers(1, 10, operations),
+            )
+        ]
+        parser = AsciiParser(ascii_string=",".join(steps))
+        start = time.perf_counter()
+        parser.get_focussing_power()
+        seconds = time.perf_counter() - start
+        print(f"{operations:>8} ops: {seconds * 1e3:.1f}ms {operations / seconds:,.0f} ops/s")
 
 
 class Solution:
@@ -82,8 +298,18 @@ class Solution:
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--benchmark", action="store_true", help="Run throughput benchmarks")
+    if arg_parser.parse_args().benchmark:
+        _benchmark("puzzle_input.txt")
+        _benchmark_focussing_power()
+
     assert Solution("example.txt").puzzle_01() == 1320
+    assert get_total_value_streamed("example.txt") == 1320
     assert Solution("example.txt").puzzle_02() == 145
+    with open("example.txt", encoding="utf-8") as example_file:
+        example_checkpoints = list(FocusingPowerTracker().checkpoints(iter_steps(example_file), 5))
+    assert example_checkpoints == [(5, 5), (10, 153), (11, 145)]
 
     puzzle_result = Solution("puzzle_input.txt")
     print(f"Solution 01: {puzzle_result.puzzle_01()}")
@@ -5,29 +5,74 @@ Solution to https://adventofcode.com/2023/day/16
 Usage: solution.py
 """
 
-from dataclasses import dataclass, replace
-from enum import Enum, auto
+from dataclasses import dataclass
+from enum import IntEnum
 from pathlib import Path
-from typing import List, Optional, Tuple
-
-
-class Direction(Enum):
-    LEFT = auto()
-    UP = auto()
-    RIGHT = auto()
-    DOWN = auto()
-
-
-class GridElement(Enum):
-    OFF = auto()
-    ON = auto()
-    MIRROR_RIGHT = auto()
-    MIRROR_LEFT = auto()
-    SPLITTER_HOR = auto()
-    SPLITTER_VERT = auto()
-
-
-Grid = List[List[GridElement]]
+from typing import Dict, List, Tuple
+
+
+class Direction(IntEnum):
+    LEFT = 0
+    UP = 1
+    RIGHT = 2
+    DOWN = 3
+
+
+class GridElement(IntEnum):
+    OFF = 0
+    ON = 1
+    MIRROR_RIGHT = 2
+    MIRROR_LEFT = 3
+    SPLITTER_HOR = 4
+    SPLITTER_VERT = 5
+
+
+CHARACTERS = {
+    ".": GridElement.OFF,
+    "#": GridElement.ON,
+    "/": GridElement.MIRROR_RIGHT,
+    "\\": GridElement.MIRROR_LEFT,
+    "-": GridElement.SPLITTER_HOR,
+    "|": GridElement.SPLITTER_VERT,
+}
+UNKNOWN = 255
+
+# Byte translation from input characters to cell codes; anything else becomes UNKNOWN.
+CELL_CODES = bytes(CHARACTERS.get(chr(char), UNKNOWN) for char in range(256))
+
+# Directions a beam leaves a tile in, by tile and the direction it entered in.
+TRANSITIONS: Dict[Tuple[GridElement, Direction], Tuple[Direction, ...]] = {
+    **{(GridElement.OFF, direction): (direction,) for direction in Direction},
+    **{(GridElement.ON, direction): (direction,) for direction in Direction},
+    (GridElement.MIRROR_RIGHT, Direction.LEFT): (Direction.DOWN,),
+    (GridElement.MIRROR_RIGHT, Direction.UP): (Direction.RIGHT,),
+    (GridElement.MIRROR_RIGHT, Direction.RIGHT): (Direction.UP,),
+    (GridElement.MIRROR_RIGHT, Direction.DOWN): (Direction.LEFT,),
+    (GridElement.MIRROR_LEFT, Direction.LEFT): (Direction.UP,),
+    (GridElement.MIRROR_LEFT, Direction.UP): (Direction.LEFT,),
+    (GridElement.MIRROR_LEFT, Direction.RIGHT): (Direction.DOWN,),
+    (GridElement.MIRROR_LEFT, Direction.DOWN): (Direction.RIGHT,),
+    (GridElement.SPLITTER_HOR, Direction.LEFT): (Direction.LEFT,),
+    (GridElement.SPLITTER_HOR, Direction.UP): (Direction.LEFT, Direction.RIGHT),
+    (GridElement.SPLITTER_HOR, Direction.RIGHT): (Direction.RIGHT,),
+    (GridElement.SPLITTER_HOR, Direction.DOWN): (Direction.LEFT, Direction.RIGHT),
+    (GridElement.SPLITTER_VERT, Direction.LEFT): (Direction.UP, Direction.DOWN),
+    (GridElement.SPLITTER_VERT, Direction.UP): (Direction.UP,),
+    (GridElement.SPLITTER_VERT, Direction.RIGHT): (Direction.UP, Direction.DOWN),
+    (GridElement.SPLITTER_VERT, Direction.DOWN): (Direction.DOWN,),
+}
+NO_SPLIT = 255
+
+# TRANSITIONS flattened into byte tables indexed by cell << 2 | direction: the direction the
+# beam carries on in, and the direction of the second beam a splitter sends out (or NO_SPLIT).
+EXITS = bytes(
+    TRANSITIONS[element, direction][0] for element in GridElement for direction in Direction
+)
+SPLITS = bytes(
+    (TRANSITIONS[element, direction] + (NO_SPLIT,))[1]
+    for element in GridElement
+    for direction in Direction
+)
 
 
 @dataclass
@@ -35,138 +80,87 @@ class Position:
     x: int
     y: int
 
-    def step(self, direction: Direction) -> "Position":
-        if direction == Direction.DOWN:
-            return replace(self, y=self.y + 1)
-        elif direction == Direction.LEFT:
-            return replace(self, x=self.x - 1)
-        elif direction == Direction.RIGHT:
-            return replace(self, x=self.x + 1)
-        elif direction == Direction.UP:
-            return replace(self, y=self.y - 1)
-
     def __repr__(self) -> str:
         return f"(x={self.x}, y={self.y})"
 
 
 class EGrid:
+    """\
+    Grid stored as a flat buffer of cell codes with a one tile border.
+
+    Positions inside the beam walk are flat indices into the buffer; a step adds the offset of
+    its direction. The border is marked as seen in every direction up front, so a beam leaving
+    the grid ends exactly like one repeating a state and the walk needs no bounds checks.
+    """
+
     def __init__(self, grid_repr: List[str]) -> None:
         self._length = len(grid_repr)
         self._width = len(grid_repr[0])
+        if any(len(row) != self._width for row in grid_repr):
+            raise ValueError("All grid rows must have the same length")
 
-        self._energised: Grid = self._get_empty(width=self._width, length=self._length)
-        self._map: Grid = self._map_to_grid(grid_repr)
-        self.print_grid(self._map)
-
-    def _get_empty(self, width: int, length: int) -> Grid:
-        return [[GridElement.OFF for _ in range(width)] for _ in range(length)]
-
-    def _grid_to_map(self, grid: Grid) -> str:
-        def map_element_to_char(element: GridElement) -> str:
-            if element == GridElement.OFF:
-                return "."
-            if element == GridElement.ON:
-                return "#"
-            if element == GridElement.MIRROR_RIGHT:
-                return "/"
-            if element == GridElement.MIRROR_LEFT:
-                return "\\"
-            if element == GridElement.SPLITTER_VERT:
-                return "|"
-            if element == GridElement.SPLITTER_HOR:
-                return "-"
-            raise ValueError(f"Cannot parse character: {element}")
-
-        return "\n".join(["".join(map(map_element_to_char, row)) for row in grid])
-
-    def _map_to_grid(self, grid_repr: List[str]) -> Grid:
-        def map_char_to_element(char: str) -> GridElement:
-            if char == ".":
-                return GridElement.OFF
-            if char == "#":
-                return GridElement.ON
-            if char == "/":
-                return GridElement.MIRROR_RIGHT
-            if char == "\\":
-                return GridElement.MIRROR_LEFT
-            if char == "|":
-                return GridElement.SPLITTER_VERT
-            if char == "-":
-                return GridElement.SPLITTER_HOR
-            raise ValueError(f"Cannot parse character: {char}")
-
-        return [list(map(map_char_to_element, row)) for row in grid_repr]
+        self._stride = self._width + 2
+        self._offsets = (-1, -self._stride, 1, self._stride)
+
+        padding = bytes(self._stride)
+        rows = (b"\0" + row.encode("latin-1").translate(CELL_CODES) + b"\0" for row in grid_repr)
+        self._cells = padding + b"".join(rows) + padding
+        if UNKNOWN in self._cells:
+            raise ValueError(f"Cannot parse grid: {grid_repr}")
+
+        border = bytearray([0b1111]) * len(self._cells)
+        for y in range(self._length):
+            start = (y + 1) * self._stride + 1
+            border[start : start + self._width] = bytes(self._width)
+        self._border = bytes(border)
 
     def _is_invalid_posistion(self, position: Position) -> bool:
-        if position.x < 0 or position.x > self._width:
+        if position.x < 0 or position.x >= self._width:
             return True
-        if position.y < 0 or position.y > self._length:
+        if position.y < 0 or position.y >= self._length:
             return True
         return False
 
-    def energise_tiles(self, start: Position, direction: Direction) -> Grid:
-        def energise_tile(pos: Position, dir: Direction) -> None:
-            if self._is_invalid_posistion(pos):
-                print(f"Invalid position: {pos}")
-                return
-
-            self._energised[pos.y][pos.x] = GridElement.ON
-            print(f"Stepping {pos} to {dir}")
-            el = self._map[pos.y][pos.x]
-            new_pos = pos.step(dir)
-
-            if dir == Direction.LEFT:
-                if el == GridElement.MIRROR_LEFT:
-                    energise_tile(new_pos, Direction.UP)
-                elif el == GridElement.MIRROR_RIGHT:
-                    energise_tile(new_pos, Direction.DOWN)
-                elif el == GridElement.SPLITTER_VERT:
-                    energise_tile(new_pos, Direction.UP)
-                    energise_tile(new_pos, Direction.DOWN)
-                else:
-                    energise_tile(new_pos, Direction.LEFT)
-            elif dir == Direction.RIGHT:
-                if el == GridElement.MIRROR_LEFT:
-                    energise_tile(new_pos, Direction.DOWN)
-                elif el == GridElement.MIRROR_RIGHT:
-                    energise_tile(new_pos, Direction.UP)
-                elif el == GridElement.SPLITTER_VERT:
-                    print("Going up...")
-                    energise_tile(new_pos, Direction.UP)
-                    print("Now going down...")
-                    energise_tile(new_pos, Direction.DOWN)
-                else:
-                    energise_tile(new_pos, Direction.RIGHT)
-            elif dir == Direction.UP:
-                if el == GridElement.MIRROR_LEFT:
-                    energise_tile(new_pos, Direction.LEFT)
-                elif el == GridElement.MIRROR_RIGHT:
-                    energise_tile(new_pos, Direction.RIGHT)
-                elif el == GridElement.SPLITTER_HOR:
-                    energise_tile(new_pos, Direction.LEFT)
-                    energise_tile(new_pos, Direction.DOWN)
-                else:
-                    energise_tile(new_pos, Direction.UP)
-            elif dir == Direction.DOWN:
-                if el == GridElement.MIRROR_LEFT:
-                    energise_tile(new_pos, Direction.RIGHT)
-                elif el == GridElement.MIRROR_RIGHT:
-                    energise_tile(new_pos, Direction.LEFT)
-                elif el == GridElement.SPLITTER_HOR:
-                    energise_tile(new_pos, Direction.LEFT)
-                    energise_tile(new_pos, Direction.DOWN)
-                else:
-                    energise_tile(new_pos, Direction.DOWN)
-
-        energise_tile(start, direction)
-        self.print_grid(grid=self._energised)
-        return self._energised
-
-    def print_grid(self, grid: Optional[Grid] = None) -> None:
-        if grid is None:
-            grid = self._energised
-
-        print(self._grid_to_map(grid))
+    def energise_tiles(self, start: Position, direction: Direction) -> int:
+        """\
+        Follows the beam from start and returns the number of energised tiles.
+
+        Beams are walked tile by tile from an explicit stack of (index << 2 | direction) states;
+        a split pushes the second beam and the walk carries on with the first. `seen` holds one
+        bit per direction for every tile, so a beam stops as soon as it enters a tile in a
+        direction already walked, which also ends loops between mirrors. Every (tile, direction)
+        state is visited at most once.
+        """
+        if self._is_invalid_posistion(start):
+            return 0
+
+        cells = self._cells
+        offsets = self._offsets
+        seen = bytearray(self._border)
+        stack = [((start.y + 1) * self._stride + start.x + 1) << 2 | direction]
+        while stack:
+            state = stack.pop()
+            index = state >> 2
+            heading = state & 3
+            while not seen[index] >> heading & 1:
+                seen[index] |= 1 << heading
+
+                transition = cells[index] << 2 | heading
+                split = SPLITS[transition]
+                if split != NO_SPLIT:
+                    stack.append((index + offsets[split]) << 2 | split)
+                heading = EXITS[transition]
+                index += offsets[heading]
+
+        return len(seen) - seen.count(0) - (len(self._border) - self._border.count(0))
+
+    def print_grid(self) -> None:
+        characters = {element: character for character, element in CHARACTERS.items()}
+        rows = (
+            self._cells[(y + 1) * self._stride + 1 : (y + 2) * self._stride - 1]
+            for y in range(self._length)
+        )
+        print("\n".join("".join(characters[GridElement(cell)] for cell in row) for row in rows))
 
 
 class EnergiseGrid:
@@ -175,9 +169,7 @@ class EnergiseGrid:
 
     def get_energised_tiles(self) -> int:
         grid = EGrid(self._grid)
-        grid.energise_tiles(start=Position(0, 0), direction=Direction.RIGHT)
-
-        return 1
+        return grid.energise_tiles(start=Position(0, 0), direction=Direction.RIGHT)
 
 
 class Solution:
@@ -194,6 +186,8 @@ class Solution:
 
 if __name__ == "__main__":
     assert Solution("example.txt").puzzle_01() == 46
+    # The beam split downwards comes back into the splitter; revisits must end the walk.
+    assert EnergiseGrid(".|\\\n...\n.\\/").get_energised_tiles() == 7
     # assert Solution("example.txt").puzzle_02() == 145
 
     puzzle_result = Solution("puzzle_input.txt")